@@ -31,6 +31,12 @@ class Config:
         self.DB_BACKUP_ENABLED = os.getenv("DB_BACKUP_ENABLED", "false").lower() == "true"
         self.DB_BACKUP_INTERVAL = int(os.getenv("DB_BACKUP_INTERVAL", "3600"))
         
+        # WAL checkpoint interval (seconds) for the background maintenance thread
+        self.DB_CHECKPOINT_INTERVAL = int(os.getenv("DB_CHECKPOINT_INTERVAL", "30"))
+        
+        # PRAGMA optimize interval (seconds) for the background maintenance thread
+        self.DB_OPTIMIZE_INTERVAL = int(os.getenv("DB_OPTIMIZE_INTERVAL", "3600"))
+        
         # Ensure data directory exists
         self.DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
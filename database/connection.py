@@ -4,80 +4,205 @@ Database connection and initialization module
 import sqlite3
 import queue
 import threading
-from contextlib import contextmanager
+import time
+from contextlib import closing, contextmanager
+from datetime import datetime
 from pathlib import Path
 from config.settings import config
 from utils.logging_utils import get_logger
-from database.schema import TABLES, INDEXES
+from database.schema import TABLES, INDEXES, OBSOLETE_INDEXES, AUDIT_TRIGGERS
 
 logger = get_logger(__name__)
 
 class DatabaseManager:
-    """A thread-safe SQLite connection pool manager"""
+    """A thread-safe SQLite connection pool manager.
+
+    WAL allows many concurrent readers but only one writer, so the pool holds a
+    single read-write connection plus a sub-pool of query-only reader connections.
+    """
     def __init__(self, db_path, pool_size=5):
         self.db_path = db_path
         self.pool_size = pool_size
-        self.pool = queue.Queue(maxsize=pool_size)
+        self.writer = queue.Queue(maxsize=1)
+        self.readers = queue.Queue(maxsize=pool_size)
         self.lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._maintenance_thread = None
+        # Bumped after every committed change to app data, so readers can tell cached results are stale
+        self.write_version = 0
         self._create_pool()
 
     def _create_pool(self):
-        """Creates the connection pool"""
+        """Creates the writer connection and the reader pool"""
+        self.writer.put(self._create_connection())
         for _ in range(self.pool_size):
-            self.pool.put(self._create_connection())
+            self.readers.put(self._create_connection(read_only=True))
 
-    def _create_connection(self):
+    def _create_connection(self, read_only=False):
         """Creates a new database connection"""
         try:
             conn = sqlite3.connect(
                 self.db_path,
-                timeout=10.0,
-                check_same_thread=False
+                timeout=10.0,  # busy timeout: wait out WAL writer contention instead of failing
+                check_same_thread=False,
+                cached_statements=256,
+                # Autocommit: single statements commit on their own, multi-statement writes open
+                # BEGIN IMMEDIATE explicitly, and reads never start a transaction
+                isolation_level=None
             )
             conn.row_factory = sqlite3.Row
+            if not read_only:
+                # Both settings are stored in the database file, so only the writer (created
+                # first) applies them. page_size only takes effect before the switch to WAL.
+                conn.execute("PRAGMA page_size = 8192")
+                conn.execute("PRAGMA journal_mode = WAL")
             conn.execute("PRAGMA foreign_keys = ON")
-            conn.execute("PRAGMA journal_mode = DELETE")
             conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA cache_size = -64000")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            conn.execute("PRAGMA mmap_size = 268435456")
+            # Checkpoints run on the maintenance thread, not on whichever commit crosses the threshold
+            conn.execute("PRAGMA wal_autocheckpoint = 0")
+            if read_only:
+                conn.execute("PRAGMA query_only = 1")
             return conn
         except sqlite3.Error as e:
-            logger.error(f"Database error: {e}")
+            logger.error("Database error: %s", e)
             raise
 
     @contextmanager
-    def get_connection(self):
-        """Get a connection from the pool"""
-        conn = self.pool.get()
+    def _checkout(self, pool):
+        conn = pool.get()
         try:
             yield conn
         finally:
-            self.pool.put(conn)
+            pool.put(conn)
+
+    def get_writer(self):
+        """Get the single read-write connection"""
+        return self._checkout(self.writer)
+
+    def get_reader(self):
+        """Get a query-only connection from the reader pool"""
+        return self._checkout(self.readers)
+
+    def get_connection(self):
+        """Get a read-write connection (alias of get_writer)"""
+        return self.get_writer()
+
+    def mark_changed(self):
+        """Record a committed write; call while still holding the writer connection"""
+        self.write_version += 1
+
+    def backup(self, backup_dir):
+        """Write a timestamped copy of the live database using SQLite's online backup API"""
+        backup_dir = Path(backup_dir)
+        backup_dir.mkdir(parents=True, exist_ok=True)
+        backup_path = backup_dir / f"{Path(self.db_path).stem}_{datetime.now():%Y%m%d_%H%M%S}.db"
+        with self.get_reader() as src, closing(sqlite3.connect(backup_path)) as dst:
+            # Copy in chunks so the writer is not held off for the whole backup
+            src.backup(dst, pages=256, sleep=0.001)
+        return backup_path
+
+    def optimize(self):
+        """Let SQLite refresh planner statistics where they have gone stale"""
+        with self.get_writer() as conn:
+            conn.execute("PRAGMA optimize")
+
+    def start_maintenance(self, checkpoint_interval=30, backup_interval=0, backup_dir=None,
+                          optimize_interval=3600):
+        """Start the background thread that checkpoints the WAL, refreshes planner
+        statistics and takes backups"""
+        if self._maintenance_thread and self._maintenance_thread.is_alive():
+            return
+
+        def maintenance_worker():
+            last_backup = last_optimize = time.monotonic()
+            while not self._stop_event.wait(checkpoint_interval):
+                try:
+                    with self.get_reader() as conn:
+                        conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+                except sqlite3.Error as e:
+                    logger.warning("WAL checkpoint failed: %s", e)
+
+                if time.monotonic() - last_optimize >= optimize_interval:
+                    last_optimize = time.monotonic()
+                    try:
+                        self.optimize()
+                    except sqlite3.Error as e:
+                        logger.warning("PRAGMA optimize failed: %s", e)
+
+                if backup_interval and time.monotonic() - last_backup >= backup_interval:
+                    last_backup = time.monotonic()
+                    try:
+                        backup_path = self.backup(backup_dir)
+                        logger.info("Database backed up to %s", backup_path)
+                    except (sqlite3.Error, OSError) as e:
+                        logger.error("Database backup failed: %s", e)
+
+        self._stop_event.clear()
+        self._maintenance_thread = threading.Thread(
+            target=maintenance_worker, name="db-maintenance", daemon=True
+        )
+        self._maintenance_thread.start()
 
     def close_all(self):
         """Close all connections in the pool"""
+        self._stop_event.set()
+        if self._maintenance_thread:
+            self._maintenance_thread.join()
+            self._maintenance_thread = None
         with self.lock:
-            while not self.pool.empty():
-                conn = self.pool.get()
+            while not self.readers.empty():
+                self.readers.get().close()
+            while not self.writer.empty():
+                conn = self.writer.get()
+                try:
+                    conn.execute("PRAGMA optimize")
+                    # Fold the WAL back into the main file so no -wal/-shm sidecars linger
+                    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                except sqlite3.Error as e:
+                    logger.warning("Database maintenance failed during shutdown: %s", e)
                 conn.close()
 
 db_manager = DatabaseManager(config.DB_PATH)
 
+BACKUP_DIR = config.DB_PATH.parent / "backups"
+
+
 def init_database():
     """Initialize the SQLite database with enhanced schema"""
     try:
-        with db_manager.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            for table_name, table_sql in TABLES.items():
-                logger.info(f"Creating table: {table_name}")
-                cursor.execute(table_sql)
+        with db_manager.get_writer() as conn:
+            with conn:
+                cursor = conn.cursor()
+                # Build the whole schema in one transaction
+                cursor.execute("BEGIN IMMEDIATE")
+                
+                for table_name, table_sql in TABLES.items():
+                    logger.info("Creating table: %s", table_name)
+                    cursor.execute(table_sql)
+
+                for index_sql in INDEXES:
+                    logger.info("Creating index: %s", index_sql)
+                    cursor.execute(index_sql)
+
+                for index_name in OBSOLETE_INDEXES:
+                    cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
 
-            for index_sql in INDEXES:
-                logger.info(f"Creating index: {index_sql}")
-                cursor.execute(index_sql)
+                # Audit rows are written by triggers, so they only exist while auditing is enabled
+                for trigger_name, trigger_sql in AUDIT_TRIGGERS.items():
+                    if config.ENABLE_AUDIT_LOG:
+                        logger.info("Creating trigger: %s", trigger_name)
+                        cursor.execute(trigger_sql)
+                    else:
+                        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
+                
+                # Refresh planner statistics so the composite indexes are picked up
+                cursor.execute("ANALYZE")
             
-            conn.commit()
             logger.info("Database initialized successfully")
             
     except Exception as e:
-        logger.error(f"Failed to initialize database: {e}")
+        logger.error("Failed to initialize database: %s", e)
         raise
@@ -45,7 +45,34 @@ TABLES = {
 }
 
 INDEXES = [
-    "CREATE INDEX IF NOT EXISTS idx_app_usage_user ON app_usage(user)",
-    "CREATE INDEX IF NOT EXISTS idx_app_usage_date ON app_usage(log_date)",
-    "CREATE INDEX IF NOT EXISTS idx_app_usage_app ON app_usage(application_name)"
+    "CREATE INDEX IF NOT EXISTS idx_app_usage_user_date ON app_usage(user, log_date DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_app_usage_created_at ON app_usage(created_at DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_audit_log_table_record ON audit_log(table_name, record_id)"
 ]
+
+# Single-column indexes no query uses any more, dropped from existing databases
+OBSOLETE_INDEXES = [
+    "idx_app_usage_user",
+    "idx_app_usage_date",
+    "idx_app_usage_app"
+]
+
+# audit_log entries for app_usage changes, written inside the same statement
+AUDIT_TRIGGERS = {
+    "trg_app_usage_audit_insert": """
+        CREATE TRIGGER IF NOT EXISTS trg_app_usage_audit_insert
+        AFTER INSERT ON app_usage
+        BEGIN
+            INSERT INTO audit_log (action, table_name, record_id, details)
+            VALUES ('INSERT', 'app_usage', new.id, 'User: ' || new.user || ', App: ' || new.application_name);
+        END
+    """,
+    "trg_app_usage_audit_delete": """
+        CREATE TRIGGER IF NOT EXISTS trg_app_usage_audit_delete
+        AFTER DELETE ON app_usage
+        BEGIN
+            INSERT INTO audit_log (action, table_name, record_id, details)
+            VALUES ('DELETE', 'app_usage', old.id, 'Deleted record for user: ' || old.user);
+        END
+    """
+}
@@ -5,7 +5,7 @@ Built with FastMCP with modular architecture and security improvements
 """
 import argparse
 import sys
-from database.connection import init_database, db_manager
+from database.connection import init_database, db_manager, BACKUP_DIR
 from server.mcp_server import create_mcp_server
 from utils.logging_utils import setup_logging, get_logger
 from config.settings import config
@@ -22,12 +22,15 @@ def parse_arguments():
 
 def start_mcp_server():
     """Main function to start the MCP server with enhanced error handling and monitoring"""
+    # Bound before anything can fail so the except/finally blocks can always log
+    logger = get_logger("main")
+    
     try:
         # Parse command line arguments
         args = parse_arguments()
         
         # Setup logging
-        logger = setup_logging()
+        setup_logging()
         
         # Update logging level if specified
         if args.log_level:
@@ -35,11 +38,17 @@ def start_mcp_server():
             logging.getLogger().setLevel(getattr(logging, args.log_level))
         
         logger.info("Starting MCP Application Monitor Server")
-        logger.info(f"Configuration: Max records={config.MAX_QUERY_RESULTS}, Rate limit={config.RATE_LIMIT_REQUESTS}/{config.RATE_LIMIT_WINDOW}s")
+        logger.info("Configuration: Max records=%s, Rate limit=%s/%ss", config.MAX_QUERY_RESULTS, config.RATE_LIMIT_REQUESTS, config.RATE_LIMIT_WINDOW)
         
         # Initialize the database
         logger.info("Initializing database...")
         init_database()
+        db_manager.start_maintenance(
+            config.DB_CHECKPOINT_INTERVAL,
+            backup_interval=config.DB_BACKUP_INTERVAL if config.DB_BACKUP_ENABLED else 0,
+            backup_dir=BACKUP_DIR,
+            optimize_interval=config.DB_OPTIMIZE_INTERVAL
+        )
         
         # Create and configure the MCP server
         logger.info("Creating MCP server...")
@@ -52,11 +61,11 @@ def start_mcp_server():
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
-        logger.error(f"Critical error: {e}")
+        logger.error("Critical error: %s", e)
+        sys.exit(1)
     finally:
         logger.info("Closing database connections...")
         db_manager.close_all()
-        sys.exit(1)
 
 
 if __name__ == "__main__":
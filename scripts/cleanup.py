@@ -4,36 +4,57 @@ Cleanup script for MCP Application Monitor Server
 Recursively removes Python cache files and directories
 """
 import os
+import re
 import shutil
 import sys
 import argparse
+from fnmatch import translate
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, Iterator, List, Optional, Tuple
+
+
+def _walk(root_path: Path, prune: Optional[Callable[[os.DirEntry], bool]] = None) -> Iterator[os.DirEntry]:
+    """
+    Yield every entry below root_path using os.scandir
+    
+    The file type comes from the directory listing itself, so no extra stat()
+    is needed per entry. Directories for which prune(entry) is true are yielded
+    but not descended into. Symlinked directories are not followed.
+    """
+    stack = [os.fspath(root_path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    yield entry
+                    if entry.is_dir(follow_symlinks=False) and not (prune and prune(entry)):
+                        stack.append(entry.path)
+        except OSError:
+            # Unreadable directory, skip it like os.walk does
+            continue
 
 
 def find_pycache_dirs(root_path: Path) -> List[Path]:
     """Find all __pycache__ directories recursively"""
-    pycache_dirs = []
-    
-    for root, dirs, files in os.walk(root_path):
-        if "__pycache__" in dirs:
-            pycache_path = Path(root) / "__pycache__"
-            pycache_dirs.append(pycache_path)
+    def is_pycache(entry: os.DirEntry) -> bool:
+        return entry.name == "__pycache__"
     
-    return pycache_dirs
+    return [
+        Path(entry.path)
+        for entry in _walk(root_path, prune=is_pycache)
+        if is_pycache(entry) and entry.is_dir(follow_symlinks=False)
+    ]
 
 
 def find_pyc_files(root_path: Path) -> List[Path]:
     """Find all .pyc, .pyo, and .pyd files recursively"""
-    pyc_files = []
-    extensions = [".pyc", ".pyo", ".pyd"]
-    
-    for root, dirs, files in os.walk(root_path):
-        for file in files:
-            if any(file.endswith(ext) for ext in extensions):
-                pyc_files.append(Path(root) / file)
+    extensions = (".pyc", ".pyo", ".pyd")
     
-    return pyc_files
+    return [
+        Path(entry.path)
+        for entry in _walk(root_path)
+        if entry.name.endswith(extensions) and not entry.is_dir(follow_symlinks=False)
+    ]
 
 
 def cleanup_pycache(root_path: Path, dry_run: bool = False) -> Tuple[int, int]:
@@ -158,24 +179,34 @@ def cleanup_temp_files(root_path: Path, dry_run: bool = False) -> int:
     ]
     
     files_removed = 0
-    temp_files = []
     
-    # Find temp files
-    for pattern in temp_patterns:
-        temp_files.extend(root_path.rglob(pattern))
+    # One compiled alternation instead of a fnmatch() call per pattern; case-insensitive
+    # where the filesystem is, as fnmatch() would be
+    flags = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+    temp_regex = re.compile("|".join(translate(pattern) for pattern in temp_patterns), flags)
+    
+    def is_temp(entry: os.DirEntry) -> bool:
+        return temp_regex.match(entry.name) is not None
+    
+    # Find temp files in a single pass; matched directories are removed whole, so skip their contents
+    temp_files = [
+        (entry.path, entry.is_dir(follow_symlinks=False))
+        for entry in _walk(root_path, prune=is_temp)
+        if is_temp(entry)
+    ]
     
     if temp_files:
         print(f"\nFound {len(temp_files)} temporary files:")
-        for temp_file in temp_files:
-            relative_path = temp_file.relative_to(root_path)
+        for temp_file, is_dir in temp_files:
+            relative_path = os.path.relpath(temp_file, root_path)
             if dry_run:
                 print(f"  [DRY RUN] Would remove: {relative_path}")
             else:
                 try:
-                    if temp_file.is_file():
-                        temp_file.unlink()
-                    elif temp_file.is_dir():
+                    if is_dir:
                         shutil.rmtree(temp_file)
+                    else:
+                        os.unlink(temp_file)
                     print(f"  ✓ Removed: {relative_path}")
                     files_removed += 1
                 except Exception as e:
@@ -1,6 +1,9 @@
 """
 Security decorators and rate limiting for MCP server
 """
+import asyncio
+import inspect
+import re
 import time
 import threading
 from functools import wraps
@@ -9,65 +12,98 @@ from utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
+# Characters flagged as potentially unsafe by check_input()
+_UNSAFE_CHARS = re.compile(r"[<>&\"']")
+_MAX_ARG_LEN = 1000
+
 
 class RateLimiter:
-    """Rate limiter implementation with thread safety"""
+    """Token-bucket rate limiter with thread safety.
+
+    Holds up to max_requests tokens, refilled continuously at
+    max_requests / window_seconds tokens per second.
+    """
     
     def __init__(self, max_requests: int, window_seconds: int):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests = []
+        self.rate = max_requests / window_seconds
+        self.tokens = float(max_requests)
+        self.last_refill = time.monotonic()
         self.lock = threading.Lock()
     
     def is_allowed(self) -> bool:
+        now = time.monotonic()
         with self.lock:
-            now = time.time()
-            # Remove old requests
-            self.requests = [req_time for req_time in self.requests if now - req_time < self.window_seconds]
+            # Clamp in case another thread refilled with a later timestamp first
+            elapsed = max(0.0, now - self.last_refill)
+            self.tokens = min(self.max_requests, self.tokens + elapsed * self.rate)
+            self.last_refill = max(self.last_refill, now)
             
-            if len(self.requests) < self.max_requests:
-                self.requests.append(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
                 return True
             return False
 
 
-# Global rate limiter instance
-rate_limiter = RateLimiter(config.RATE_LIMIT_REQUESTS, config.RATE_LIMIT_WINDOW)
+# Per-tool rate limiters, keyed by function name
+_limiters = {}
 
 
-def rate_limit(func):
-    """Rate limiting decorator"""
+def run_in_thread(func):
+    """Run a blocking tool in a worker thread so the MCP event loop stays free"""
     @wraps(func)
-    def wrapper(*args, **kwargs):
-        if not rate_limiter.is_allowed():
-            logger.warning(f"Rate limit exceeded for function {func.__name__}")
-            return "Error: Rate limit exceeded. Please try again later."
-        return func(*args, **kwargs)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
     return wrapper
 
 
-def audit_log(func):
-    """Audit logging decorator"""
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        if config.ENABLE_AUDIT_LOG:
-            logger.info(f"Function {func.__name__} called with args: {args[:2]}...")  # Log first 2 args only for security
-        result = func(*args, **kwargs)
-        if config.ENABLE_AUDIT_LOG:
-            logger.info(f"Function {func.__name__} completed successfully")
-        return result
-    return wrapper
+def check_input(arg: str, name: str):
+    """Return an error message for an over-long string, or None; unsafe characters are only logged.
+    name is the tool the input came from, used in the warning"""
+    if len(arg) > _MAX_ARG_LEN:  # Prevent extremely long strings
+        return "Error: Input too long"
+    if _UNSAFE_CHARS.search(arg):
+        logger.warning("Potentially unsafe input detected in %s", name)
+    return None
 
 
-def validate_input(func):
-    """Input validation decorator"""
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        # Basic input validation
-        for arg in args:
-            if isinstance(arg, str) and len(arg) > 1000:  # Prevent extremely long strings
-                return "Error: Input too long"
-            if isinstance(arg, str) and any(char in arg for char in ['<', '>', '&', '"', "'"]):
-                logger.warning(f"Potentially unsafe input detected in {func.__name__}")
-        return func(*args, **kwargs)
-    return wrapper
+def secured(validate: bool = True):
+    """Rate limiting, optional input validation and audit logging in a single wrapper"""
+    def decorator(func):
+        name = func.__name__
+        # Resolved once per tool: (position, name) of every str-annotated parameter
+        str_params = [
+            (index, param.name)
+            for index, param in enumerate(inspect.signature(func).parameters.values())
+            if param.annotation is str
+        ] if validate else []
+        # Bound once when the tool is registered rather than looked up per call
+        limiter = _limiters.setdefault(
+            name, RateLimiter(config.RATE_LIMIT_REQUESTS, config.RATE_LIMIT_WINDOW)
+        )
+        # Fixed for the life of the server, so read once when the tool is registered
+        audit = config.ENABLE_AUDIT_LOG
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not limiter.is_allowed():
+                logger.warning("Rate limit exceeded for function %s", name)
+                return "Error: Rate limit exceeded. Please try again later."
+            
+            # FastMCP passes tool arguments by keyword, but accept positional calls too
+            for index, param_name in str_params:
+                arg = args[index] if index < len(args) else kwargs.get(param_name)
+                if isinstance(arg, str):
+                    error = check_input(arg, name)
+                    if error:
+                        return error
+            
+            if not audit:
+                return func(*args, **kwargs)
+            logger.info("Function %s called with args: %s...", name, args[:2])  # Log first 2 args only for security
+            result = func(*args, **kwargs)
+            logger.info("Function %s completed successfully", name)
+            return result
+        return wrapper
+    return decorator
@@ -1,18 +1,120 @@
-import json
+import sqlite3
+import orjson
 from datetime import datetime
 from mcp.server.fastmcp import FastMCP
 from database.connection import db_manager
-from server.decorators import rate_limit, audit_log, validate_input
+from server.decorators import check_input, run_in_thread, secured
 from config.settings import config
 from utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
+# SQL statements are module-level constants so every pooled connection reuses
+# the same prepared statement from its statement cache
+SQL_INSERT_USAGE = """
+    INSERT INTO app_usage (
+        monitor_app_version, platform, user, application_name,
+        application_version, log_date, legacy_app, duration_seconds
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_SELECT_ALL = """
+    SELECT id, monitor_app_version, platform, user, application_name,
+           application_version, log_date, legacy_app, duration_seconds,
+           created_at
+    FROM app_usage
+    ORDER BY created_at DESC
+    LIMIT ?
+"""
+
+SQL_SELECT_BY_USER = """
+    SELECT id, monitor_app_version, platform, user, application_name,
+           application_version, log_date, legacy_app, duration_seconds,
+           created_at
+    FROM app_usage
+    WHERE user = ?
+    ORDER BY log_date DESC
+    LIMIT ?
+"""
+
+SQL_SELECT_EXISTS = "SELECT user, application_name FROM app_usage WHERE id = ?"
+
+SQL_DELETE = "DELETE FROM app_usage WHERE id = ?"
+
+SQL_INSERT_USAGE_RETURNING = SQL_INSERT_USAGE + "RETURNING id\n"
+
+SQL_DELETE_RETURNING = "DELETE FROM app_usage WHERE id = ? RETURNING user, application_name"
+
+# INSERT/DELETE ... RETURNING is available from SQLite 3.35
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Fields (and their types) expected in each insert_app_usage_records_bulk record, in _usage_row order
+RECORD_FIELDS = {
+    "monitor_app_version": str,
+    "platform": str,
+    "user": str,
+    "application_name": str,
+    "application_version": str,
+    "log_date": str,
+    "legacy_app": bool,
+    "duration_seconds": int
+}
+STR_FIELDS = [field for field, field_type in RECORD_FIELDS.items() if field_type is str]
+
+
+# Column length limits, matching the CHECK constraints on app_usage
+MAX_SHORT_TEXT = 50   # monitor_app_version, platform, application_version
+MAX_NAME_TEXT = 100   # user, application_name
+
+
+def _usage_row(monitor_app_version: str, platform: str, user: str, application_name: str,
+               application_version: str, log_date: str, legacy_app: bool,
+               duration_seconds: int) -> tuple:
+    """Build SQL_INSERT_USAGE parameters, truncating text to the column limits.
+    Slicing a str that already fits returns the same object, so short input is not copied."""
+    return (
+        monitor_app_version[:MAX_SHORT_TEXT], platform[:MAX_SHORT_TEXT], user[:MAX_NAME_TEXT],
+        application_name[:MAX_NAME_TEXT], application_version[:MAX_SHORT_TEXT],
+        log_date, legacy_app, duration_seconds
+    )
+
+
+def _row_to_record(row: tuple) -> dict:
+    """Build a record dict from a SQL_SELECT_* result tuple"""
+    (record_id, monitor_app_version, platform, user, application_name,
+     application_version, log_date, legacy_app, duration_seconds, created_at) = row
+    return {
+        "id": record_id,
+        "monitor_app_version": monitor_app_version,
+        "platform": platform,
+        "user": user,
+        "application_name": application_name,
+        "application_version": application_version,
+        "log_date": log_date,
+        "legacy_app": bool(legacy_app),
+        "duration_seconds": duration_seconds,
+        "created_at": created_at
+    }
+
+
+def _validate_record(log_date: str, duration_seconds: int):
+    """Return an error message for an invalid record, or None if it is valid"""
+    if duration_seconds < 0 or duration_seconds > 86400:  # Max 24 hours
+        return "Error: Invalid duration_seconds (must be 0-86400)"
+    
+    # Validate date format; Python 3.10 fromisoformat does not accept a trailing Z
+    try:
+        datetime.fromisoformat(log_date.replace('Z', '+00:00'))
+    except ValueError:
+        return "Error: Invalid log_date format (use ISO format)"
+    
+    return None
+
+
 def register_app_usage_tools(mcp: FastMCP):
     @mcp.tool()
-    @rate_limit
-    @audit_log
-    @validate_input
+    @run_in_thread
+    @secured(validate=True)
     def insert_app_usage_record(
         monitor_app_version: str,
         platform: str,
@@ -28,50 +130,92 @@ def register_app_usage_tools(mcp: FastMCP):
         """
         try:
             # Additional validation
-            if duration_seconds < 0 or duration_seconds > 86400:  # Max 24 hours
-                return "Error: Invalid duration_seconds (must be 0-86400)"
-            
-            # Validate date format
-            try:
-                datetime.fromisoformat(log_date.replace('Z', '+00:00'))
-            except ValueError:
-                return "Error: Invalid log_date format (use ISO format)"
+            error = _validate_record(log_date, duration_seconds)
+            if error:
+                return error
             
-            with db_manager.get_connection() as conn:
+            with db_manager.get_writer() as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute("""
-                    INSERT INTO app_usage (
-                        monitor_app_version, platform, user, application_name,
-                        application_version, log_date, legacy_app, duration_seconds
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    monitor_app_version[:50], platform[:50], user[:100], 
-                    application_name[:100], application_version[:50], 
-                    log_date, legacy_app, duration_seconds
+                cursor.execute(SQL_INSERT_USAGE_RETURNING if HAS_RETURNING else SQL_INSERT_USAGE, _usage_row(
+                    monitor_app_version, platform, user, application_name,
+                    application_version, log_date, legacy_app, duration_seconds
                 ))
                 
-                record_id = cursor.lastrowid
-                
-                # Audit log
-                if config.ENABLE_AUDIT_LOG:
-                    cursor.execute("""
-                        INSERT INTO audit_log (action, table_name, record_id, details)
-                        VALUES (?, ?, ?, ?)
-                    """, ("INSERT", "app_usage", record_id, f"User: {user}, App: {application_name}"))
-                
-                conn.commit()
+                record_id = cursor.fetchone()[0] if HAS_RETURNING else cursor.lastrowid
+                db_manager.mark_changed()
                 
-                logger.info(f"Record inserted successfully with ID: {record_id}")
+                logger.info("Record inserted successfully with ID: %s", record_id)
                 return f"Successfully inserted record with ID: {record_id}"
         
         except Exception as e:
-            logger.error(f"Error inserting record: {e}")
+            logger.error("Error inserting record: %s", e)
             return f"Error inserting record: Database operation failed"
 
     @mcp.tool()
-    @rate_limit
-    @audit_log
+    @run_in_thread
+    @secured(validate=False)
+    def insert_app_usage_records_bulk(records: list[dict]) -> str:
+        """
+        Insert many application usage records in a single transaction.
+        """
+        try:
+            if not records:
+                return "Error: No records provided"
+            
+            if len(records) > config.MAX_QUERY_RESULTS:
+                return f"Error: Too many records (max {config.MAX_QUERY_RESULTS} per call)"
+            
+            rows = []
+            for index, record in enumerate(records):
+                if not isinstance(record, dict):
+                    return f"Error: Record {index} is not an object"
+                
+                missing = [field for field in RECORD_FIELDS if field not in record]
+                if missing:
+                    return f"Error: Record {index} is missing fields: {', '.join(missing)}"
+                
+                # Exact type match: bool is a subclass of int, so isinstance would let true through as 1
+                invalid = [field for field, field_type in RECORD_FIELDS.items()
+                           if type(record[field]) is not field_type]
+                if invalid:
+                    return f"Error: Record {index} has invalid field types: {', '.join(invalid)}"
+                
+                # secured() has no str parameter to check here, so apply the same checks per field
+                for field in STR_FIELDS:
+                    error = check_input(record[field], "insert_app_usage_records_bulk")
+                    if error:
+                        return f"{error} in record {index}"
+                
+                error = _validate_record(record["log_date"], record["duration_seconds"])
+                if error:
+                    return f"{error} in record {index}"
+                
+                rows.append(_usage_row(*map(record.__getitem__, RECORD_FIELDS)))
+            
+            with db_manager.get_writer() as conn:
+                with conn:
+                    cursor = conn.cursor()
+                    
+                    # Take the write lock up front rather than upgrading mid-batch and hitting SQLITE_BUSY
+                    cursor.execute("BEGIN IMMEDIATE")
+                    cursor.executemany(SQL_INSERT_USAGE, rows)
+                    
+                    # Rows inserted by one statement on the single writer get contiguous IDs
+                    last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+                    first_id = last_id - len(rows) + 1
+                db_manager.mark_changed()
+                
+                logger.info("Bulk inserted %s records with IDs %s-%s", len(rows), first_id, last_id)
+                return f"Successfully inserted {len(rows)} records with IDs {first_id}-{last_id}"
+        
+        except Exception as e:
+            logger.error("Error bulk inserting records: %s", e)
+            return "Error inserting records: Database operation failed"
+
+    @mcp.tool()
+    @run_in_thread
+    @secured(validate=False)
     def delete_app_usage_record(record_id: int) -> str:
         """
         Delete an application usage record with audit logging.
@@ -80,37 +224,36 @@ def register_app_usage_tools(mcp: FastMCP):
             if record_id <= 0:
                 return "Error: Invalid record ID"
             
-            with db_manager.get_connection() as conn:
+            with db_manager.get_writer() as conn:
                 cursor = conn.cursor()
                 
-                # Check if record exists first
-                cursor.execute("SELECT user, application_name FROM app_usage WHERE id = ?", (record_id,))
-                record = cursor.fetchone()
+                if HAS_RETURNING:
+                    # Delete and fetch the audit details in a single statement
+                    cursor.execute(SQL_DELETE_RETURNING, (record_id,))
+                    record = cursor.fetchone()
+                else:
+                    with conn:
+                        # Check if record exists first, holding the write lock until the delete
+                        cursor.execute("BEGIN IMMEDIATE")
+                        cursor.execute(SQL_SELECT_EXISTS, (record_id,))
+                        record = cursor.fetchone()
+                        if record:
+                            cursor.execute(SQL_DELETE, (record_id,))
                 
                 if not record:
                     return f"No record found with ID: {record_id}"
+                db_manager.mark_changed()
                 
-                cursor.execute("DELETE FROM app_usage WHERE id = ?", (record_id,))
-                
-                # Audit log
-                if config.ENABLE_AUDIT_LOG:
-                    cursor.execute("""
-                        INSERT INTO audit_log (action, table_name, record_id, details)
-                        VALUES (?, ?, ?, ?)
-                    """, ("DELETE", "app_usage", record_id, f"Deleted record for user: {record['user']}"))
-                
-                conn.commit()
-                
-                logger.info(f"Record {record_id} deleted successfully")
+                logger.info("Record %s deleted successfully", record_id)
                 return f"Successfully deleted record with ID: {record_id}"
         
         except Exception as e:
-            logger.error(f"Error deleting record {record_id}: {e}")
+            logger.error("Error deleting record %s: %s", record_id, e)
             return f"Error deleting record: Database operation failed"
 
     @mcp.tool()
-    @rate_limit
-    @audit_log
+    @run_in_thread
+    @secured(validate=False)
     def get_all_app_usage_records(limit: int = None) -> str:
         """
         Retrieve application usage records with pagination support.
@@ -123,34 +266,13 @@ def register_app_usage_tools(mcp: FastMCP):
             if limit <= 0:
                 return "Error: Invalid limit value"
             
-            with db_manager.get_connection() as conn:
+            with db_manager.get_reader() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = None  # Plain tuples, unpacked positionally
                 
-                cursor.execute("""
-                    SELECT id, monitor_app_version, platform, user, application_name,
-                           application_version, log_date, legacy_app, duration_seconds,
-                           created_at
-                    FROM app_usage 
-                    ORDER BY created_at DESC 
-                    LIMIT ?
-                """, (limit,))
-                
-                rows = cursor.fetchall()
-                
-                records = []
-                for row in rows:
-                    records.append({
-                        "id": row["id"],
-                        "monitor_app_version": row["monitor_app_version"],
-                        "platform": row["platform"],
-                        "user": row["user"],
-                        "application_name": row["application_name"],
-                        "application_version": row["application_version"],
-                        "log_date": row["log_date"],
-                        "legacy_app": bool(row["legacy_app"]),
-                        "duration_seconds": row["duration_seconds"],
-                        "created_at": row["created_at"]
-                    })
+                cursor.execute(SQL_SELECT_ALL, (limit,))
+                
+                records = [_row_to_record(row) for row in cursor]
                 
                 result = {
                     "total_records": len(records),
@@ -158,16 +280,15 @@ def register_app_usage_tools(mcp: FastMCP):
                     "records": records
                 }
                 
-                return json.dumps(result, indent=2)
+                return orjson.dumps(result).decode()
         
         except Exception as e:
-            logger.error(f"Error retrieving records: {e}")
+            logger.error("Error retrieving records: %s", e)
             return "Error retrieving records: Database operation failed"
 
     @mcp.tool()
-    @rate_limit  
-    @audit_log
-    @validate_input
+    @run_in_thread
+    @secured(validate=True)
     def get_app_usage_by_user(user: str, limit: int = None) -> str:
         """
         Retrieve application usage records for a specific user with security checks.
@@ -176,40 +297,18 @@ def register_app_usage_tools(mcp: FastMCP):
             if not user or len(user.strip()) == 0:
                 return "Error: User parameter is required"
             
-            user = user.strip()[:100]  # Truncate for security
+            user = user.strip()[:MAX_NAME_TEXT]  # Truncate for security
             
             if limit is None or limit > config.MAX_QUERY_RESULTS:
                 limit = config.MAX_QUERY_RESULTS
                 
-            with db_manager.get_connection() as conn:
+            with db_manager.get_reader() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = None  # Plain tuples, unpacked positionally
+                
+                cursor.execute(SQL_SELECT_BY_USER, (user, limit))
                 
-                cursor.execute("""
-                    SELECT id, monitor_app_version, platform, user, application_name,
-                           application_version, log_date, legacy_app, duration_seconds,
-                           created_at
-                    FROM app_usage 
-                    WHERE user = ? 
-                    ORDER BY log_date DESC 
-                    LIMIT ?
-                """, (user, limit))
-                
-                rows = cursor.fetchall()
-                
-                records = []
-                for row in rows:
-                    records.append({
-                        "id": row["id"],
-                        "monitor_app_version": row["monitor_app_version"],
-                        "platform": row["platform"],
-                        "user": row["user"],
-                        "application_name": row["application_name"],
-                        "application_version": row["application_version"],
-                        "log_date": row["log_date"],
-                        "legacy_app": bool(row["legacy_app"]),
-                        "duration_seconds": row["duration_seconds"],
-                        "created_at": row["created_at"]
-                    })
+                records = [_row_to_record(row) for row in cursor]
                 
                 result = {
                     "user": user,
@@ -218,8 +317,8 @@ def register_app_usage_tools(mcp: FastMCP):
                     "records": records
                 }
                 
-                return json.dumps(result, indent=2)
+                return orjson.dumps(result).decode()
         
         except Exception as e:
-            logger.error(f"Error retrieving records for user {user}: {e}")
+            logger.error("Error retrieving records for user %s: %s", user, e)
             return f"Error retrieving records: Database operation failed"
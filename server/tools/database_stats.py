@@ -1,46 +1,68 @@
-import json
+import time
+import orjson
 from mcp.server.fastmcp import FastMCP
 from database.connection import db_manager
-from server.decorators import rate_limit, audit_log
+from server.decorators import run_in_thread, secured
 from config.settings import config
 from utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
+# Scalar aggregates share a single scan of app_usage; the platform breakdown rides
+# along in the same round trip, told apart by the kind column
+SQL_STATS = """
+    SELECT 'summary' as kind,
+           NULL as platform,
+           COUNT(*) as total,
+           COUNT(DISTINCT user) as unique_users,
+           COUNT(DISTINCT application_name) as unique_apps,
+           COALESCE(SUM(legacy_app), 0) as legacy_count
+    FROM app_usage
+    UNION ALL
+    SELECT 'platform', platform, COUNT(*), NULL, NULL, NULL
+    FROM app_usage
+    GROUP BY platform
+"""
+
+# Stats responses are reused for up to this many seconds while no tool has written to the database
+STATS_CACHE_TTL = 60
+
+_stats_cache = {"version": None, "expires": 0.0, "payload": None}
+
+
 def register_database_stats_tool(mcp: FastMCP):
     @mcp.tool()
-    @rate_limit
-    @audit_log
+    @run_in_thread
+    @secured(validate=False)
     def get_database_stats() -> str:
         """
         Get database statistics with performance monitoring.
         """
         try:
-            with db_manager.get_connection() as conn:
+            # Read before querying: a write racing the query only makes the cached payload newer
+            version = db_manager.write_version
+            if _stats_cache["version"] == version and time.monotonic() < _stats_cache["expires"]:
+                return _stats_cache["payload"]
+            
+            with db_manager.get_reader() as conn:
                 cursor = conn.cursor()
                 
-                # Total records
-                cursor.execute("SELECT COUNT(*) as total FROM app_usage")
-                total_records = cursor.fetchone()["total"]
-                
-                # Unique users
-                cursor.execute("SELECT COUNT(DISTINCT user) as unique_users FROM app_usage")
-                unique_users = cursor.fetchone()["unique_users"]
-                
-                # Unique applications
-                cursor.execute("SELECT COUNT(DISTINCT application_name) as unique_apps FROM app_usage")
-                unique_apps = cursor.fetchone()["unique_apps"]
-                
-                # Platform distribution
-                cursor.execute("SELECT platform, COUNT(*) as count FROM app_usage GROUP BY platform")
-                platform_stats = {row["platform"]: row["count"] for row in cursor.fetchall()}
-                
-                # Legacy app count
-                cursor.execute("SELECT COUNT(*) as legacy_count FROM app_usage WHERE legacy_app = 1")
-                legacy_count = cursor.fetchone()["legacy_count"]
+                # Totals, unique users/applications, legacy app count and platform distribution
+                platform_stats = {}
+                for row in cursor.execute(SQL_STATS):
+                    if row["kind"] == "summary":
+                        summary = row
+                    else:
+                        platform_stats[row["platform"]] = row["total"]
+                total_records = summary["total"]
+                unique_users = summary["unique_users"]
+                unique_apps = summary["unique_apps"]
+                legacy_count = summary["legacy_count"]
                 
-                # Database file size
-                db_size = config.DB_PATH.stat().st_size if config.DB_PATH.exists() else 0
+                # Logical database size, known to SQLite without a stat() and unaffected by -wal/-shm files
+                page_count = cursor.execute("PRAGMA page_count").fetchone()[0]
+                page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+                db_size = page_count * page_size
                 
                 stats = {
                     "total_records": total_records,
@@ -53,8 +75,10 @@ def register_database_stats_tool(mcp: FastMCP):
                     "rate_limiting": f"{config.RATE_LIMIT_REQUESTS} requests per {config.RATE_LIMIT_WINDOW}s"
                 }
                 
-                return json.dumps(stats, indent=2)
+                payload = orjson.dumps(stats).decode()
+                _stats_cache.update(version=version, expires=time.monotonic() + STATS_CACHE_TTL, payload=payload)
+                return payload
         
         except Exception as e:
-            logger.error(f"Error getting database stats: {e}")
+            logger.error("Error getting database stats: %s", e)
             return "Error getting database stats: Database operation failed"
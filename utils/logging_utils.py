@@ -1,8 +1,11 @@
 """
 Logging utilities for the MCP Application Monitor Server
 """
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from config.settings import config
 
@@ -15,7 +18,17 @@ def setup_logging():
     if config.ENABLE_AUDIT_LOG:
         log_file = Path(__file__).parent.parent / "logs" / "mcp_server.log"
         log_file.parent.mkdir(parents=True, exist_ok=True)
-        log_handlers.append(logging.FileHandler(log_file))
+        # File writes happen on the listener's thread so tool calls never block on disk I/O
+        log_queue = queue.Queue(-1)
+        listener = QueueListener(log_queue, logging.FileHandler(log_file), respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)  # Flush queued records on shutdown
+        log_handlers.append(QueueHandler(log_queue))
+    
+    # The format never shows thread or process details, so skip collecting them for every record
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
     
     logging.basicConfig(
         level=getattr(logging, config.LOG_LEVEL),
@@ -26,6 +39,5 @@ def setup_logging():
     return logging.getLogger(__name__)
 
 
-def get_logger(name: str = __name__):
-    """Get a logger instance"""
-    return logging.getLogger(name)
+# Get a logger instance; a direct alias, so there is no extra call frame per lookup
+get_logger = logging.getLogger